@@ -1,22 +1,317 @@
-import requests
-from typing import Dict, List, Optional, Union, Any
+import asyncio
+import atexit
+import concurrent.futures
+import copy
+import dataclasses
+import ijson
+import orjson
+import threading
+import time
+import weakref
+from cachetools import TLRUCache
+from types import MappingProxyType
+from urllib.parse import quote, quote_plus, urlencode
+from typing import TYPE_CHECKING, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple, Union, Any
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# aiohttp is imported where it is used, so importing this module (e.g. just for
+# format_podcast_results) doesn't pay for loading the HTTP stack
+if TYPE_CHECKING:
+    import aiohttp
+
+# Logging is configured by the application entry point
 logger = logging.getLogger(__name__)
 
 # iTunes Search API base URL
 ITUNES_API_BASE_URL = "https://itunes.apple.com/search"
 ITUNES_LOOKUP_API_BASE_URL = "https://itunes.apple.com/lookup"
 
-def search_itunes(
+# Connection pool sizing and retry policy for iTunes requests
+POOL_MAX_CONNECTIONS = 20
+POOL_MAX_CONNECTIONS_PER_HOST = 10
+MAX_RETRIES = 2
+RETRY_BACKOFF_FACTOR = 0.3
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Shared read-only stand-in for absent optional parameters
+_EMPTY_PARAMS: Mapping[str, Any] = MappingProxyType({})
+
+# Query parameters search_itunes sets itself, which additional_params may override
+_SEARCH_PARAM_KEYS = frozenset({"term", "media", "limit", "country", "entity"})
+
+# Responses for requests above this limit are parsed incrementally as they
+# arrive instead of being buffered whole; below it orjson on the full body wins
+STREAM_PARSE_MIN_LIMIT = 25
+
+# Most IDs sent in one comma-separated lookup before the URL gets too long
+BATCH_LOOKUP_MAX_IDS = 75
+
+# Response cache: iTunes catalog data changes slowly, so successful responses
+# are kept for a few minutes and served without a network round trip. Entries
+# with an ETag or Last-Modified validator are kept a while longer once stale so
+# they can be refreshed with a conditional request.
+CACHE_MAX_SIZE = 1024
+CACHE_TTL_SECONDS = 600
+CACHE_REVALIDATE_SECONDS = 3600
+
+class _CacheEntry(NamedTuple):
+    data: Dict[str, Any]
+    stored_at: float
+    ttl: float
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+def _cache_expiry(_key: str, entry: _CacheEntry, _now: float) -> float:
+    expires_at = entry.stored_at + entry.ttl
+    if entry.etag or entry.last_modified:
+        expires_at += CACHE_REVALIDATE_SECONDS
+    return expires_at
+
+_cache: "TLRUCache[str, _CacheEntry]" = TLRUCache(
+    maxsize=CACHE_MAX_SIZE,
+    ttu=_cache_expiry,
+    timer=time.monotonic
+)
+_cache_lock = threading.Lock()
+
+def _cache_get(key: str) -> Optional[_CacheEntry]:
+    with _cache_lock:
+        return _cache.get(key)
+
+def _cache_put(
+    key: str,
+    data: Dict[str, Any],
+    ttl: float,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None
+) -> None:
+    with _cache_lock:
+        _cache[key] = _CacheEntry(data, time.monotonic(), ttl, etag, last_modified)
+
+# One shared client session per event loop, created on first use
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+def _accept_encoding() -> str:
+    """
+    Build the Accept-Encoding header, advertising Brotli only when it can be decoded.
+    
+    aiohttp decompresses br responses when the Brotli package is installed, but its
+    default header only offers gzip and deflate.
+    
+    Returns:
+        str: The Accept-Encoding header value
+    """
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return "gzip, deflate"
+    return "gzip, deflate, br"
+
+_ACCEPT_ENCODING = _accept_encoding()
+
+def _get_session() -> "aiohttp.ClientSession":
+    """
+    Return the aiohttp session bound to the running event loop, creating it lazily.
+    
+    Returns:
+        aiohttp.ClientSession: A session whose connections are reused across calls
+    """
+    import aiohttp
+    
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_MAX_CONNECTIONS,
+            limit_per_host=POOL_MAX_CONNECTIONS_PER_HOST
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"Accept-Encoding": _ACCEPT_ENCODING}
+        )
+        _sessions[loop] = session
+    return session
+
+async def close_session() -> None:
+    """
+    Close the aiohttp session bound to the running event loop, if any.
+    Call this on application shutdown.
+    """
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+async def _get_json(
+    url: str,
+    stream_parse: bool = False,
+    headers: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[str]]:
+    """
+    GET a JSON document from iTunes, retrying connection failures and retryable statuses.
+    
+    Result items are trimmed to the fields this module reads (see _KEEP_FIELDS).
+    
+    Args:
+        url (str): The fully encoded request URL, query string included
+        stream_parse (bool): Parse result items with ijson while the body is still arriving,
+            so a large payload is never held in memory in full
+        headers (Optional[Dict[str, str]]): Extra request headers, e.g. conditional request validators
+        
+    Returns:
+        Tuple[Optional[Dict[str, Any]], Optional[str], Optional[str]]: The decoded JSON body
+        (None on 304 Not Modified, an error dict on HTTP errors), followed by the response's
+        ETag and Last-Modified headers
+    """
+    import aiohttp
+    from yarl import URL
+    
+    # The URL is already encoded, so stop aiohttp from parsing and requoting it
+    request_url = URL(url, encoded=True)
+    session = _get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(RETRY_BACKOFF_FACTOR * (2 ** (attempt - 1)))
+        try:
+            async with session.get(request_url, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                if response.status in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+                    logger.warning(f"iTunes returned HTTP {response.status}, retrying")
+                    continue
+                
+                # Check for HTTP errors
+                status = response.status
+                if status >= 400:
+                    logger.error(f"iTunes returned HTTP {status}")
+                    return {"error": f"HTTP {status}", "resultCount": 0, "results": []}, None, None
+                
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if status == 304:
+                    return None, etag, last_modified
+                
+                if stream_parse:
+                    # Parse result items as they stream in. ijson's errors don't derive from
+                    # ValueError, so re-raise them as one, like orjson's, for the callers
+                    try:
+                        results = [
+                            _project_result(item)
+                            async for item in ijson.items(response.content, "results.item", use_float=True)
+                        ]
+                    except ijson.JSONError as e:
+                        raise ValueError(str(e)) from e
+                    return {"resultCount": len(results), "results": results}, etag, last_modified
+                
+                # Parse the raw JSON bytes with orjson (iTunes serves it as text/javascript)
+                data = orjson.loads(await response.read())
+                data["results"] = [_project_result(item) for item in data.get("results", ())]
+                return data, etag, last_modified
+        except aiohttp.ClientConnectionError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            logger.warning(f"Connection error talking to iTunes, retrying: {str(e)}")
+
+async def _fetch_and_cache(url: str, cache_ttl: float, stream_parse: bool) -> Dict[str, Any]:
+    """
+    Request an iTunes URL and store the response in the cache.
+    
+    A stale entry that carries an ETag or Last-Modified validator is refreshed with a
+    conditional request; on 304 Not Modified the cached body is reused without
+    downloading or parsing it again.
+    
+    Returns:
+        Dict[str, Any]: The decoded JSON body, shared with the cache (callers must copy it)
+    """
+    entry = _cache_get(url) if cache_ttl > 0 else None
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    
+    data, etag, last_modified = await _get_json(url, stream_parse, headers)
+    
+    if data is None:
+        logger.info(f"iTunes response not modified, reusing cached copy: {url}")
+        data = entry.data
+        etag = etag or entry.etag
+        last_modified = last_modified or entry.last_modified
+    elif "error" in data or cache_ttl <= 0:
+        # Never cache error responses
+        return data
+    
+    _cache_put(url, data, cache_ttl, etag, last_modified)
+    return data
+
+# Requests currently on the wire, keyed by URL. Concurrent callers asking for the
+# same URL wait for the first one instead of issuing their own request. These are
+# concurrent.futures futures so callers on the sync wrapper's loop can share them.
+_inflight: Dict[str, "concurrent.futures.Future[Dict[str, Any]]"] = {}
+_inflight_lock = threading.Lock()
+
+class _LeaderCancelled(Exception):
+    """Set on an in-flight future when the request fetching it was cancelled."""
+
+async def _fetch_json(url: str, cache_ttl: float, stream_parse: bool = False) -> Dict[str, Any]:
+    """
+    Fetch an iTunes endpoint, serving repeated requests from the response cache and
+    coalescing concurrent identical requests into one.
+    
+    Args:
+        url (str): The fully encoded request URL, which also serves as the cache key
+        cache_ttl (float): Seconds a cached response may be reused (0 disables caching)
+        stream_parse (bool): Parse the response incrementally (see _get_json)
+        
+    Returns:
+        Dict[str, Any]: The decoded JSON body, safe for the caller to mutate
+    """
+    if cache_ttl > 0:
+        entry = _cache_get(url)
+        if entry is not None and time.monotonic() - entry.stored_at < cache_ttl:
+            logger.info(f"iTunes request served from cache: {url}")
+            # Hand out a copy so callers mutating results can't poison the cache
+            return copy.deepcopy(entry.data)
+    
+    with _inflight_lock:
+        future = _inflight.get(url)
+        is_leader = future is None
+        if is_leader:
+            future = _inflight[url] = concurrent.futures.Future()
+    
+    if is_leader:
+        try:
+            try:
+                data = await _fetch_and_cache(url, cache_ttl, stream_parse)
+            finally:
+                # Unregister before resolving, so a retrying follower starts a new request
+                with _inflight_lock:
+                    del _inflight[url]
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            # Only this caller was cancelled, so let the followers retry without it
+            future.set_exception(_LeaderCancelled())
+            raise
+        future.set_result(data)
+    else:
+        logger.info(f"Joining in-flight iTunes request: {url}")
+        try:
+            # Shielded, so a cancelled follower doesn't cancel the shared future
+            data = await asyncio.shield(asyncio.wrap_future(future))
+        except _LeaderCancelled:
+            logger.info(f"In-flight iTunes request was cancelled, retrying: {url}")
+            return await _fetch_json(url, cache_ttl, stream_parse)
+    
+    return copy.deepcopy(data)
+
+async def search_itunes(
     query: str,
     media: str = "podcast",
     entity: Optional[str] = None,
     limit: int = 10,
     country: str = "US",
-    additional_params: Optional[Dict[str, Any]] = None
+    additional_params: Optional[Dict[str, Any]] = None,
+    cache_ttl: float = CACHE_TTL_SECONDS
 ) -> Dict[str, Any]:
     """
     Search for podcasts or podcast episodes using the iTunes Search API.
@@ -28,89 +323,342 @@ def search_itunes(
         limit (int): Maximum number of results to return (default: 10)
         country (str): Two-letter country code (default: "US")
         additional_params (Optional[Dict[str, Any]]): Any additional parameters to include in the request
+        cache_ttl (float): Seconds a cached response may be reused (default: 600, 0 disables caching)
         
     Returns:
-        Dict[str, Any]: The API response containing search results or error information
+        Dict[str, Any]: The API response containing search results or error information.
+        Result items only carry the fields format_podcast_results uses.
     
     Examples:
         >>> # Search for podcasts with "technology" in the title
-        >>> search_itunes("technology podcast", entity="podcast")
+        >>> await search_itunes("technology podcast", entity="podcast")
         
         >>> # Search for specific podcast episodes about "AI"
-        >>> search_itunes("AI", entity="podcastEpisode", limit=5)
+        >>> await search_itunes("AI", entity="podcastEpisode", limit=5)
     """
-    try:
-        # Check if we're looking up episodes for a specific podcast
-        is_podcast_lookup = (entity == "podcastEpisode" and 
-                            additional_params and 
-                            "collectionId" in additional_params)
-        
-        # Use lookup API for podcast episodes by ID
-        if is_podcast_lookup:
-            podcast_id = additional_params["collectionId"]
-            logger.info(f"Looking up episodes for podcast ID: {podcast_id}")
-            
-            # Prepare lookup parameters
-            lookup_params = {
-                "id": podcast_id,
-                "entity": "podcastEpisode",
-                "limit": limit,
-                "country": country,
-            }
-            
-            # Make the request to the iTunes Lookup API
-            response = requests.get(
-                ITUNES_LOOKUP_API_BASE_URL, 
-                params=lookup_params, 
-                timeout=15
-            )
-            
-        else:
-            # Standard search API request
-            # Prepare the request parameters
-            params = {
-                "term": query,
-                "media": media,
-                "limit": limit,
-                "country": country,
-            }
-            
-            # Add entity parameter if provided
-            if entity:
-                params["entity"] = entity
-                
-            # Add any additional parameters
-            if additional_params:
-                params.update(additional_params)
-                
-            logger.info(f"Searching iTunes with params: {params}")
-            
-            # Make the request to the iTunes Search API
-            response = requests.get(ITUNES_API_BASE_URL, params=params, timeout=15)
-        
-        # Check for HTTP errors
-        response.raise_for_status()
-        
-        # Parse the JSON response
-        data = response.json()
+    import aiohttp
+    
+    extra = additional_params or _EMPTY_PARAMS
+    
+    # Check if we're looking up episodes for a specific podcast
+    is_podcast_lookup = entity == "podcastEpisode" and "collectionId" in extra
+    
+    # Use lookup API for podcast episodes by ID
+    if is_podcast_lookup:
+        podcast_id = extra["collectionId"]
+        logger.info(f"Looking up episodes for podcast ID: {podcast_id}")
         
-        # Log basic info about results
-        result_count = data.get("resultCount", 0)
-        logger.info(f"iTunes {'lookup' if is_podcast_lookup else 'search'} returned {result_count} results")
+        # Build the lookup URL directly; only the caller-supplied values need quoting
+        url = (
+            f"{ITUNES_LOOKUP_API_BASE_URL}?id={quote(str(podcast_id), safe=',')}"
+            f"&entity=podcastEpisode&limit={int(limit)}&country={quote(country)}"
+        )
         
-        return data
+    elif extra.keys() & _SEARCH_PARAM_KEYS:
+        # Additional parameters that replace built-in ones can't be appended to the
+        # prebuilt query string without sending the key twice, so build it in full
+        params = {"term": query, "media": media, "limit": limit, "country": country}
+        if entity:
+            params["entity"] = entity
+        params.update(extra)
+        limit = params["limit"]
+        url = f"{ITUNES_API_BASE_URL}?{urlencode(params)}"
+        logger.info(f"Searching iTunes: {url}")
         
-    except requests.exceptions.RequestException as e:
+    else:
+        # Standard search API request, with the entity (if provided) and any
+        # additional parameters appended to a prebuilt query string
+        url = (
+            f"{ITUNES_API_BASE_URL}?term={quote_plus(query)}&media={quote_plus(media)}"
+            f"&limit={int(limit)}&country={quote(country)}"
+        )
+        if entity:
+            url += f"&entity={quote_plus(entity)}"
+        if extra:
+            url += "&" + urlencode(extra)
+        logger.info(f"Searching iTunes: {url}")
+    
+    # Make the request to the iTunes Search or Lookup API
+    try:
+        data = await _fetch_json(url, cache_ttl, stream_parse=int(limit) > STREAM_PARSE_MIN_LIMIT)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         logger.error(f"Request error when searching iTunes: {str(e)}")
         return {"error": f"Request failed: {str(e)}", "resultCount": 0, "results": []}
     except ValueError as e:
         logger.error(f"JSON parsing error: {str(e)}")
         return {"error": f"Failed to parse response: {str(e)}", "resultCount": 0, "results": []}
-    except Exception as e:
-        logger.error(f"Unexpected error during iTunes search: {str(e)}")
-        return {"error": f"Unexpected error: {str(e)}", "resultCount": 0, "results": []}
+    
+    if "error" in data:
+        return data
+    
+    # Log basic info about results
+    result_count = data.get("resultCount", 0)
+    logger.info(f"iTunes {'lookup' if is_podcast_lookup else 'search'} returned {result_count} results")
+    
+    # Tell the formatter whether the first result is the looked-up podcast itself
+    data["_is_lookup"] = is_podcast_lookup
+    
+    return data
+
+async def _lookup_batch(
+    ids: List[str],
+    entity: str,
+    limit: int,
+    country: str,
+    cache_ttl: float
+) -> List[Dict[str, Any]]:
+    import aiohttp
+    
+    url = (
+        f"{ITUNES_LOOKUP_API_BASE_URL}?id={quote(','.join(ids), safe=',')}"
+        f"&entity={quote_plus(entity)}&limit={int(limit)}&country={quote(country)}"
+    )
+    try:
+        data = await _fetch_json(url, cache_ttl, stream_parse=int(limit) > STREAM_PARSE_MIN_LIMIT)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Request error during iTunes batch lookup of {len(ids)} IDs: {str(e)}")
+        return []
+    except ValueError as e:
+        logger.error(f"JSON parsing error during iTunes batch lookup: {str(e)}")
+        return []
+    # Error responses carry an empty results list
+    return data["results"]
+
+async def search_itunes_batch(
+    ids: List[Union[int, str]],
+    entity: str = "podcastEpisode",
+    limit: int = 200,
+    country: str = "US",
+    cache_ttl: float = CACHE_TTL_SECONDS
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Look up several podcasts at once using comma-separated IDs on the iTunes Lookup API.
+    
+    IDs are sent BATCH_LOOKUP_MAX_IDS at a time, so a handful of podcasts costs a
+    single round trip instead of one request per podcast.
+    
+    Args:
+        ids (List[Union[int, str]]): The podcast collection IDs to look up
+        entity (str): The entity type to return for each podcast (default: "podcastEpisode")
+        limit (int): Maximum number of results to return (default: 200)
+        country (str): Two-letter country code (default: "US")
+        cache_ttl (float): Seconds a cached response may be reused (default: 600, 0 disables caching)
+        
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Raw results grouped by collection ID. Each list starts
+        with the podcast itself, so it can be formatted with
+        format_podcast_results({"results": items, "_is_lookup": True}).
+        IDs whose request failed are missing from the mapping.
+    
+    Examples:
+        >>> episodes_by_podcast = await search_itunes_batch([1200361736, 360084272])
+    """
+    # Drop duplicates while keeping the caller's order
+    unique_ids = list(dict.fromkeys(str(podcast_id) for podcast_id in ids))
+    batches = [
+        unique_ids[i:i + BATCH_LOOKUP_MAX_IDS]
+        for i in range(0, len(unique_ids), BATCH_LOOKUP_MAX_IDS)
+    ]
+    logger.info(f"Looking up {len(unique_ids)} podcast IDs in {len(batches)} batch request(s)")
+    
+    responses = await asyncio.gather(*(
+        _lookup_batch(batch, entity, limit, country, cache_ttl) for batch in batches
+    ))
+    
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for results in responses:
+        for item in results:
+            group = grouped.setdefault(str(item.get("collectionId", "")), [])
+            if item.get("kind") == "podcast-episode":
+                group.append(item)
+            else:
+                # Keep the podcast entry first, matching single-lookup responses
+                group.insert(0, item)
+    
+    return grouped
+
+# Background event loop shared by blocking callers, so they reuse one connection pool
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="itunes-api", daemon=True).start()
+            atexit.register(_stop_sync_loop)
+    return _sync_loop
+
+def _stop_sync_loop() -> None:
+    asyncio.run_coroutine_threadsafe(close_session(), _sync_loop).result(timeout=5)
+    _sync_loop.call_soon_threadsafe(_sync_loop.stop)
+
+def search_itunes_sync(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Blocking wrapper around search_itunes for callers without an event loop.
+    
+    Accepts the same arguments as search_itunes. Calls run on a shared background
+    event loop, so consecutive searches reuse pooled connections.
+    
+    Returns:
+        Dict[str, Any]: The API response containing search results or error information
+    """
+    future = asyncio.run_coroutine_threadsafe(search_itunes(*args, **kwargs), _get_sync_loop())
+    return future.result()
+
+class _FormattedResult:
+    """Common base for formatted results, which use __slots__ to stay small."""
+    __slots__ = ()
+    
+    def asdict(self) -> Dict[str, Any]:
+        """Return the result as a plain dict, e.g. for JSON serialization."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+@dataclasses.dataclass(slots=True)
+class PodcastResult(_FormattedResult):
+    id: Union[int, str] = ""
+    title: str = ""
+    description: str = ""
+    artwork_url: str = ""
+    artist: str = ""
+    feed_url: str = ""
+    genre: str = ""
+    release_date: str = ""
+    episode_count: int = 0
+    country: str = ""
+    type: str = "podcast"
 
-def format_podcast_results(itunes_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+@dataclasses.dataclass(slots=True)
+class EpisodeResult(_FormattedResult):
+    id: Union[int, str] = ""
+    podcast_id: Union[int, str] = ""
+    podcast_title: str = ""
+    title: str = ""
+    description: str = ""
+    artwork_url: str = ""
+    audio_url: str = ""
+    duration: int = 0
+    release_date: str = ""
+    episode_number: Union[int, str] = ""
+    season: Union[int, str] = ""
+    type: str = "episode"
+
+@dataclasses.dataclass(slots=True)
+class UnknownResult(_FormattedResult):
+    id: Union[int, str] = ""
+    title: str = ""
+    description: str = ""
+    artwork_url: str = ""
+    type: str = "unknown"
+
+FormattedResult = Union[PodcastResult, EpisodeResult, UnknownResult]
+
+# Output schemas for format_podcast_results: (output field, source key(s), default).
+# A tuple of source keys is tried in order; an empty tuple always yields the default.
+# Fields are listed in the order of the matching result dataclass.
+_PODCAST_FIELDS = (
+    ("id", "collectionId", ""),
+    ("title", "collectionName", ""),
+    ("description", ("description", "collectionCensoredName"), ""),
+    ("artwork_url", ("artworkUrl600", "artworkUrl100"), ""),
+    ("artist", "artistName", ""),
+    ("feed_url", "feedUrl", ""),
+    ("genre", "primaryGenreName", ""),
+    ("release_date", "releaseDate", ""),
+    ("episode_count", "trackCount", 0),
+    ("country", "country", ""),
+    ("type", (), "podcast"),
+)
+
+_EPISODE_FIELDS = (
+    ("id", "trackId", ""),
+    ("podcast_id", "collectionId", ""),
+    ("podcast_title", "collectionName", ""),
+    ("title", "trackName", ""),
+    ("description", "description", ""),
+    ("artwork_url", ("artworkUrl600", "artworkUrl100"), ""),
+    ("audio_url", ("episodeUrl", "previewUrl"), ""),
+    ("duration", "trackTimeMillis", 0),
+    ("release_date", "releaseDate", ""),
+    ("episode_number", "episodeNumber", ""),
+    ("season", "seasonNumber", ""),
+    ("type", (), "episode"),
+)
+
+_UNKNOWN_FIELDS = (
+    ("id", ("trackId", "collectionId"), ""),
+    ("title", ("trackName", "collectionName"), ""),
+    ("description", "description", ""),
+    ("artwork_url", "artworkUrl100", ""),
+    ("type", (), "unknown"),
+)
+
+# Raw result fields read by the formatters, the lookup heuristics and batch grouping.
+# Everything else iTunes sends (artistIds, genreIds, trackViewUrl, ...) is dropped
+# right after parsing, which keeps cached responses small and cheap to copy.
+_KEEP_FIELDS = frozenset(
+    {"kind"}
+    | {
+        key
+        for fields in (_PODCAST_FIELDS, _EPISODE_FIELDS, _UNKNOWN_FIELDS)
+        for _, source, _ in fields
+        for key in ((source,) if isinstance(source, str) else source)
+    }
+)
+
+def _project_result(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in item.items() if key in _KEEP_FIELDS}
+
+def _compile_formatter(
+    name: str,
+    fields: Tuple[Tuple[str, Any, Any], ...],
+    result_class: type
+) -> Callable[[Dict[str, Any]], FormattedResult]:
+    """
+    Generate a formatter specialised to one schema table.
+    
+    The generated function is a single constructor call with every key and default
+    inlined, e.g. EpisodeResult(i['trackId'] if 'trackId' in i else '', ...), which
+    avoids walking the table and calling dict.get for every field of every item.
+    
+    Args:
+        name (str): Name of the generated function
+        fields (Tuple[Tuple[str, Any, Any], ...]): The schema table to specialise
+        result_class (type): The dataclass to build, whose fields match the table's order
+        
+    Returns:
+        Callable[[Dict[str, Any]], FormattedResult]: The compiled formatter
+    """
+    field_names = tuple(field.name for field in dataclasses.fields(result_class))
+    if field_names != tuple(out_key for out_key, _, _ in fields):
+        raise ValueError(f"Schema for {name} does not match the fields of {result_class.__name__}")
+    
+    args = []
+    for _, source, default in fields:
+        sources = (source,) if isinstance(source, str) else source
+        expr = repr(default)
+        # Build the fallback chain from the last key outwards. Each key is only looked
+        # up when the ones before it are absent, and present-but-empty values are kept
+        # as-is, matching the nested dict.get() calls this replaced
+        for key in reversed(sources):
+            expr = f"i[{key!r}] if {key!r} in i else {expr}"
+        args.append(expr)
+    source_code = f"def {name}(i):\n    return result_class({', '.join(args)})\n"
+    namespace: Dict[str, Any] = {"result_class": result_class}
+    exec(source_code, namespace)
+    return namespace[name]
+
+_format_podcast_item = _compile_formatter("_format_podcast_item", _PODCAST_FIELDS, PodcastResult)
+_format_episode_item = _compile_formatter("_format_episode_item", _EPISODE_FIELDS, EpisodeResult)
+_format_unknown_item = _compile_formatter("_format_unknown_item", _UNKNOWN_FIELDS, UnknownResult)
+
+_FORMATTERS = {
+    "podcast": _format_podcast_item,
+    "podcast-episode": _format_episode_item,
+}
+
+def format_podcast_results(itunes_results: Dict[str, Any]) -> List[FormattedResult]:
     """
     Format iTunes API results into a standardized format for our application.
     
@@ -118,73 +666,58 @@ def format_podcast_results(itunes_results: Dict[str, Any]) -> List[Dict[str, Any
         itunes_results (Dict[str, Any]): The raw results from the iTunes Search API
         
     Returns:
-        List[Dict[str, Any]]: A list of formatted podcast or episode information
+        List[FormattedResult]: A list of formatted podcast or episode information;
+        call asdict() on each item for a JSON-serializable dict
     """
     formatted_results = []
     
     results = itunes_results.get("results", [])
     
-    # Skip the first result in lookup responses as it's the podcast itself, not an episode
-    if len(results) > 0 and "kind" not in results[0] and "collectionId" in results[0]:
+    # Lookup responses from search_itunes hold the podcast itself followed only by
+    # its episodes, so format the episodes in one pass against a single schema
+    # instead of dispatching on each item's kind
+    if itunes_results.get("_is_lookup"):
+        return [_format_episode_item(item) for item in results[1:]]
+    
+    # Skip the first result in lookup responses as it's the podcast itself, not an episode.
+    # Responses not produced by search_itunes carry no marker, so sniff the first entry
+    if "_is_lookup" not in itunes_results and len(results) > 0 and "kind" not in results[0] and "collectionId" in results[0]:
         results = results[1:]  # Skip the podcast entry
     
     for item in results:
         # Handle different kinds of results (podcast vs episode)
-        if item.get("kind") == "podcast":
-            formatted_item = {
-                "id": item.get("collectionId", ""),
-                "title": item.get("collectionName", ""),
-                "description": item.get("description", item.get("collectionCensoredName", "")),
-                "artwork_url": item.get("artworkUrl600", item.get("artworkUrl100", "")),
-                "artist": item.get("artistName", ""),
-                "feed_url": item.get("feedUrl", ""),
-                "genre": item.get("primaryGenreName", ""),
-                "release_date": item.get("releaseDate", ""),
-                "episode_count": item.get("trackCount", 0),
-                "country": item.get("country", ""),
-                "type": "podcast"
-            }
-        elif item.get("kind") == "podcast-episode" or (
-            "episodeUrl" in item and "collectionId" in item and "trackId" in item
-        ):
-            formatted_item = {
-                "id": item.get("trackId", ""),
-                "podcast_id": item.get("collectionId", ""),
-                "podcast_title": item.get("collectionName", ""),
-                "title": item.get("trackName", ""),
-                "description": item.get("description", ""),
-                "artwork_url": item.get("artworkUrl600", item.get("artworkUrl100", "")),
-                "audio_url": item.get("episodeUrl", item.get("previewUrl", "")),
-                "duration": item.get("trackTimeMillis", 0),
-                "release_date": item.get("releaseDate", ""),
-                "episode_number": item.get("episodeNumber", ""),
-                "season": item.get("seasonNumber", ""),
-                "type": "episode"
-            }
-        else:
-            # For any other type of result
-            formatted_item = {
-                "id": item.get("trackId", item.get("collectionId", "")),
-                "title": item.get("trackName", item.get("collectionName", "")),
-                "description": item.get("description", ""),
-                "artwork_url": item.get("artworkUrl100", ""),
-                "type": "unknown"
-            }
+        formatter = _FORMATTERS.get(item.get("kind"))
+        if formatter is None:
+            if "episodeUrl" in item and "collectionId" in item and "trackId" in item:
+                formatter = _format_episode_item
+            else:
+                # For any other type of result
+                formatter = _format_unknown_item
         
-        formatted_results.append(formatted_item)
+        formatted_results.append(formatter(item))
     
     return formatted_results
 
 # Example usage
-if __name__ == "__main__":
-    # Example 1: Search for tech podcasts
-    tech_podcasts = search_itunes("technology podcast", entity="podcast", limit=5)
-    print(f"Found {tech_podcasts.get('resultCount', 0)} tech podcasts")
+async def _example() -> None:
+    try:
+        # Run both searches concurrently
+        tech_podcasts, ai_episodes = await asyncio.gather(
+            # Example 1: Search for tech podcasts
+            search_itunes("technology podcast", entity="podcast", limit=5),
+            # Example 2: Search for AI podcast episodes
+            search_itunes("artificial intelligence", entity="podcastEpisode", limit=5),
+        )
+    finally:
+        await close_session()
     
-    # Example 2: Search for AI podcast episodes
-    ai_episodes = search_itunes("artificial intelligence", entity="podcastEpisode", limit=5)
+    print(f"Found {tech_podcasts.get('resultCount', 0)} tech podcasts")
     print(f"Found {ai_episodes.get('resultCount', 0)} AI podcast episodes")
     
     # Format results
     formatted_podcasts = format_podcast_results(tech_podcasts)
-    print(f"First formatted podcast: {formatted_podcasts[0] if formatted_podcasts else 'None'}") 
\ No newline at end of file
+    print(f"First formatted podcast: {formatted_podcasts[0] if formatted_podcasts else 'None'}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(_example()) 
\ No newline at end of file
@@ -1,11 +1,18 @@
 import os
 import time
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import httpx
 import traceback
 from fastapi import FastAPI, HTTPException, File, UploadFile, Query
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 import openai
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import json
 import sys
@@ -14,10 +21,23 @@ import tempfile
 import subprocess
 import shutil
 from pathlib import Path
+from urllib.parse import urlparse
 import math
+import mmap
+import re
+import hashlib
+import functools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+import tiktoken
+import logging
+from diskcache import Cache
+
+# Configure logging once for the whole application
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 # Import our iTunes API module
-from itunes_api import search_itunes, format_podcast_results
+from itunes_api import search_itunes, format_podcast_results, close_session as close_itunes_session
 
 # Load environment variables from .env file
 load_dotenv()
@@ -42,6 +62,82 @@ if OPENAI_API_KEY:
     print(f"API Key (masked): {masked_key}")
 openai.api_key = OPENAI_API_KEY
 
+# Shared session so audio downloads reuse pooled keep-alive connections
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=Retry(total=3, backoff_factor=0.3))
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# Persistent cache for transcripts and summaries, so repeat requests skip the OpenAI calls
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "podcast_transcriber_cache"))
+cache = Cache(CACHE_DIR)
+
+# How long a transcript is reused for the same URL before the audio is downloaded again
+# and checked against its content hash, in case the episode was republished
+TRANSCRIPT_URL_CACHE_TTL = 24 * 60 * 60
+
+# Chat model used for summaries
+SUMMARY_MODEL = "gpt-4o-mini"
+
+# Transcripts longer than this many tokens are summarized section by section
+# in parallel, then the section summaries are combined in a final call
+SUMMARY_CHUNK_TOKENS = 4000
+
+# Downloaded audio is kept here so it can be revalidated with ETag / Last-Modified
+# instead of downloaded again, and is pruned once unused for AUDIO_CACHE_TTL
+AUDIO_CACHE_DIR = os.path.join(CACHE_DIR, "audio")
+AUDIO_CACHE_TTL = 7 * 24 * 60 * 60
+
+# How long a request may hold a URL's audio cache files before the claim lapses
+AUDIO_LOCK_TIMEOUT = 60 * 60
+
+# OpenAI rejects audio uploads larger than 25MB
+MAX_AUDIO_FILE_SIZE = 25 * 1024 * 1024
+
+# RAM-backed directory for audio chunks when the platform has one
+SHARED_MEMORY_DIR = "/dev/shm"
+
+# Maximum number of Whisper requests in flight at once, across all requests
+MAX_CONCURRENT_TRANSCRIPTIONS = 5
+transcription_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRANSCRIPTIONS)
+
+# Chunk transcriptions queued within this window, from any request, are dispatched together
+TRANSCRIPTION_BATCH_SIZE = 8
+TRANSCRIPTION_BATCH_WAIT_SECONDS = 0.05
+
+@app.on_event("startup")
+async def startup_event():
+    # One pooled HTTP/2 client for all outbound OpenAI calls, so concurrent chunk
+    # uploads share a connection instead of each opening their own
+    app.state.http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20),
+        timeout=httpx.Timeout(300.0, connect=30.0)
+    )
+    # Created once and backed by the shared pool rather than once per chunk
+    app.state.openai_client = None
+    if OPENAI_API_KEY:
+        app.state.openai_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            max_retries=2,
+            http_client=app.state.http_client
+        )
+    # Worker processes for CPU-bound helpers, so they don't hold up the event loop
+    app.state.process_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    app.state.transcription_queue = asyncio.Queue()
+    app.state.transcription_batcher = asyncio.create_task(
+        transcription_batcher(app.state.transcription_queue)
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.transcription_batcher.cancel()
+    # Release the pooled iTunes and OpenAI connections
+    await close_itunes_session()
+    await app.state.http_client.aclose()
+    cache.close()
+    app.state.process_pool.shutdown(wait=False, cancel_futures=True)
+
 # --- Podcast Search Endpoint ---
 # For now we return dummy data. Later, you can integrate a real podcast search API.
 @app.get("/api/search")
@@ -67,7 +163,7 @@ def search_podcasts(query: str):
 
 # --- iTunes Podcast Search Endpoints ---
 @app.get("/api/itunes/podcasts")
-def search_itunes_podcasts(
+async def search_itunes_podcasts(
     query: str,
     limit: int = Query(10, ge=1, le=200),
     country: str = Query("US", min_length=2, max_length=2)
@@ -84,7 +180,7 @@ def search_itunes_podcasts(
         Formatted list of podcasts matching the search criteria
     """
     # Call the iTunes API with podcast entity
-    results = search_itunes(
+    results = await search_itunes(
         query=query,
         media="podcast",
         entity="podcast",
@@ -99,10 +195,10 @@ def search_itunes_podcasts(
     # Format the results for our application
     formatted_results = format_podcast_results(results)
     
-    return formatted_results
+    return [result.asdict() for result in formatted_results]
 
 @app.get("/api/itunes/episodes")
-def search_itunes_episodes(
+async def search_itunes_episodes(
     query: str,
     limit: int = Query(10, ge=1, le=200),
     country: str = Query("US", min_length=2, max_length=2),
@@ -133,7 +229,7 @@ def search_itunes_episodes(
             query = "*"  # Use wildcard to match all episodes
     
     # Call the iTunes API with podcastEpisode entity
-    results = search_itunes(
+    results = await search_itunes(
         query=query,
         media="podcast",
         entity="podcastEpisode",
@@ -149,17 +245,120 @@ def search_itunes_episodes(
     # Format the results for our application
     formatted_results = format_podcast_results(results)
     
-    return formatted_results
+    return [result.asdict() for result in formatted_results]
+
+async def run_in_process(func, *args):
+    """
+    Run a CPU-bound function in the shared process pool.
+    
+    Args:
+        func: A module-level (picklable) function
+        *args: Arguments to pass to func
+        
+    Returns:
+        The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.process_pool, func, *args)
 
 # --- Audio Processing Functions ---
-def check_ffmpeg_installed():
+async def run_command(cmd):
+    """
+    Run an external command without blocking the event loop.
+    
+    Args:
+        cmd: The command and its arguments
+        
+    Returns:
+        The command's stdout as bytes
+        
+    Raises:
+        subprocess.CalledProcessError: If the command exits with a non-zero status
+        FileNotFoundError: If the executable cannot be found
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+    return stdout
+
+# Result of the FFmpeg availability probe, cached after the first check
+_ffmpeg_installed = None
+
+async def check_ffmpeg_installed():
     """Check if FFmpeg is installed on the system."""
+    global _ffmpeg_installed
+    if _ffmpeg_installed is None:
+        try:
+            await run_command(["ffmpeg", "-version"])
+            _ffmpeg_installed = True
+        except (subprocess.SubprocessError, FileNotFoundError):
+            print("FFmpeg is not installed or not in PATH")
+            _ffmpeg_installed = False
+    return _ffmpeg_installed
+
+async def get_audio_codec(input_file):
+    """
+    Get the codec of the first audio stream using ffprobe.
+    
+    Args:
+        input_file: Path to the input audio file
+        
+    Returns:
+        Codec name (e.g. "mp3"), or None if it could not be determined
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        input_file
+    ]
     try:
-        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
-        return True
-    except (subprocess.SubprocessError, FileNotFoundError):
-        print("FFmpeg is not installed or not in PATH")
-        return False
+        stdout = await run_command(cmd)
+        return stdout.decode().strip() or None
+    except (subprocess.SubprocessError, FileNotFoundError) as e:
+        print(f"Error probing audio codec: {str(e)}")
+        return None
+
+def copy_file_range(src, dst, offset, count):
+    """
+    Copy a byte range from one open file to another.
+    
+    Uses os.sendfile so the data is copied inside the kernel, without a userspace
+    buffer. On platforms where sendfile can't write to a regular file, the range is
+    written straight out of a memory map of the source instead, so no intermediate
+    bytes object is allocated for the chunk.
+    
+    Args:
+        src: Source file opened for binary reading
+        dst: Destination file opened for binary writing
+        offset: Byte offset in the source to start copying from
+        count: Number of bytes to copy
+    """
+    try:
+        while count > 0:
+            sent = os.sendfile(dst.fileno(), src.fileno(), offset, count)
+            if sent == 0:
+                break
+            offset += sent
+            count -= sent
+        return
+    except (AttributeError, OSError):
+        pass
+    
+    if count <= 0:
+        return
+    with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            # Let the kernel read ahead and drop pages once they've been written out
+            mapped.madvise(mmap.MADV_SEQUENTIAL, offset - offset % mmap.PAGESIZE)
+        with memoryview(mapped)[offset:offset + count] as view:
+            dst.write(view)
 
 def split_audio_file_python(input_file, output_dir, max_size_mb=20):
     """
@@ -192,17 +391,15 @@ def split_audio_file_python(input_file, output_dir, max_size_mb=20):
     
     chunk_files = []
     
-    # Read the input file and split it
+    # Copy each byte range of the input file into its own chunk file
     with open(input_file, 'rb') as f:
         for i in range(num_chunks):
             output_file = os.path.join(output_dir, f"chunk_{i:03d}.mp3")
+            offset = i * chunk_size
+            count = min(chunk_size, file_size - offset)
             
-            # Read a chunk of data
-            data = f.read(chunk_size)
-            
-            # Write the chunk to a new file
             with open(output_file, 'wb') as chunk_f:
-                chunk_f.write(data)
+                copy_file_range(f, chunk_f, offset, count)
             
             chunk_size_mb = os.path.getsize(output_file) / (1024 * 1024)
             print(f"Created chunk {i+1}/{num_chunks}: {output_file} ({chunk_size_mb:.2f} MB)")
@@ -211,7 +408,7 @@ def split_audio_file_python(input_file, output_dir, max_size_mb=20):
     
     return chunk_files
 
-def split_audio_file(input_file, output_dir, chunk_duration_seconds=600, max_size_mb=20):
+async def split_audio_file(input_file, output_dir, chunk_duration_seconds=600, max_size_mb=20):
     """
     Split an audio file into smaller chunks using FFmpeg.
     Falls back to a Python-based method if FFmpeg is not available.
@@ -226,146 +423,352 @@ def split_audio_file(input_file, output_dir, chunk_duration_seconds=600, max_siz
         List of paths to the chunk files
     """
     # Check if FFmpeg is installed
-    if not check_ffmpeg_installed():
+    if not await check_ffmpeg_installed():
         print("FFmpeg not available, using Python fallback method")
-        return split_audio_file_python(input_file, output_dir, max_size_mb)
+        # The fallback does blocking file I/O, so run it in a worker process
+        return await run_in_process(split_audio_file_python, input_file, output_dir, max_size_mb)
     
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
-    # Get audio file duration using FFmpeg
-    duration_cmd = [
-        "ffmpeg", "-i", input_file, 
-        "-hide_banner", "-v", "error", 
-        "-show_entries", "format=duration", 
-        "-of", "default=noprint_wrappers=1:nokey=1"
+    # MP3 sources are cut without re-encoding: even at 320 kbps a chunk stays well
+    # under the API's size limit. Anything else is transcoded to small mono MP3
+    if await get_audio_codec(input_file) == "mp3":
+        print("Source is MP3, copying audio stream without re-encoding")
+        codec_args = ["-c", "copy"]
+    else:
+        codec_args = [
+            "-c:a", "libmp3lame",  # Use MP3 codec
+            "-b:a", "128k",        # Reduce bitrate to keep file size down
+            "-ac", "1",            # Convert to mono
+        ]
+    
+    # Split the whole file in one sequential pass with the segment muxer, rather than
+    # one FFmpeg process per chunk that has to seek from the start of the file
+    output_pattern = os.path.join(output_dir, "chunk_%03d.mp3")
+    cmd = [
+        "ffmpeg", "-i", input_file,
+        "-map", "0:a",         # Audio only, drop any embedded cover art
+        "-f", "segment",
+        "-segment_time", str(chunk_duration_seconds),
+        "-reset_timestamps", "1",
+        *codec_args,
+        output_pattern
     ]
     
     try:
-        result = subprocess.run(duration_cmd, capture_output=True, text=True, check=True)
-        duration = float(result.stdout.strip())
-        print(f"Audio duration: {duration} seconds")
+        await run_command(cmd)
     except subprocess.SubprocessError as e:
-        print(f"Error getting audio duration: {str(e)}")
-        # If we can't get the duration, use file size to estimate chunks
-        file_size_mb = os.path.getsize(input_file) / (1024 * 1024)
-        num_chunks = max(1, int(file_size_mb / max_size_mb) + 1)
-        duration = num_chunks * chunk_duration_seconds
-        print(f"Estimated duration based on file size: {duration} seconds")
+        print(f"Error splitting audio file: {str(e)}")
+        raise Exception(f"Failed to split audio file: {str(e)}")
     
-    # Calculate number of chunks
-    num_chunks = max(1, int(duration / chunk_duration_seconds) + 1)
-    print(f"Splitting into {num_chunks} chunks")
+    return list_chunk_files(output_dir)
+
+def list_chunk_files(output_dir):
+    """
+    List the chunks FFmpeg's segment muxer wrote to a directory, in order.
     
-    chunk_files = []
+    Args:
+        output_dir: Directory the chunks were written to
+        
+    Returns:
+        List of paths to the chunk files
+    """
+    chunk_files = [str(path) for path in sorted(Path(output_dir).glob("chunk_*.mp3"))]
+    for i, chunk_file in enumerate(chunk_files):
+        print(f"Created chunk {i+1}/{len(chunk_files)}: {chunk_file}")
+    return chunk_files
+
+def is_mp3_response(response):
+    """
+    Check whether a download is MP3 audio, from its Content-Type or URL.
     
-    # Split the file into chunks
-    for i in range(num_chunks):
-        start_time = i * chunk_duration_seconds
-        output_file = os.path.join(output_dir, f"chunk_{i:03d}.mp3")
+    Args:
+        response: The streaming response for the audio download
         
-        # FFmpeg command to extract a chunk
-        cmd = [
-            "ffmpeg", "-i", input_file,
-            "-ss", str(start_time),
-            "-t", str(chunk_duration_seconds),
-            "-c:a", "libmp3lame",  # Use MP3 codec
-            "-b:a", "128k",        # Reduce bitrate to keep file size down
-            "-ac", "1",            # Convert to mono
-            output_file
-        ]
+    Returns:
+        True if the body can be segmented as MP3 without re-encoding
+    """
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type in ("audio/mpeg", "audio/mp3"):
+        return True
+    return urlparse(response.url).path.lower().endswith(".mp3")
+
+def looks_like_mp3(data):
+    """
+    Check whether data starts like an MP3 file: an ID3 tag or an MPEG audio frame header.
+    
+    The Content-Type alone isn't enough, as some hosts label other formats audio/mpeg,
+    and FFmpeg's MP3 demuxer reads those without failing, producing unusable chunks.
+    
+    Args:
+        data: The first bytes of the file
+        
+    Returns:
+        True if the data looks like MP3 audio
+    """
+    if data.startswith(b"ID3"):
+        return True
+    # 11 bits of frame sync, then a layer other than the reserved 00 (ADTS AAC uses it)
+    return len(data) >= 2 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0 and data[1] & 0x06 != 0
+
+def audio_cache_paths(audio_url):
+    """
+    Get the audio cache paths for a URL.
+    
+    Args:
+        audio_url: URL of the audio file
         
+    Returns:
+        Tuple of (path of the complete download, path of an in-progress download)
+    """
+    name = hashlib.sha256(audio_url.encode()).hexdigest()
+    path = os.path.join(AUDIO_CACHE_DIR, f"{name}.mp3")
+    return path, path + ".part"
+
+def hash_file(path, hasher):
+    """
+    Feed the contents of a file into a hash object, in 1 MB blocks.
+    
+    Args:
+        path: Path of the file to hash
+        hasher: hashlib object to update
+    """
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+
+def write_stream_to_file(source, path, mode, hasher):
+    """
+    Copy a response body to a file in 1 MB blocks, hashing it as it goes.
+    
+    Args:
+        source: File-like object to read the body from
+        path: Path of the file to write
+        mode: File mode to open it with, 'wb' or 'ab' to append
+        hasher: hashlib object to update with the copied bytes
+    """
+    with open(path, mode) as f:
+        for block in iter(lambda: source.read(1024 * 1024), b""):
+            hasher.update(block)
+            f.write(block)
+
+def store_cached_audio(cache_key, audio_meta, partial_path, path, digest):
+    """
+    Move a finished download into the audio cache and record it as complete.
+    
+    Also prunes cached audio that hasn't been used for AUDIO_CACHE_TTL.
+    
+    Args:
+        cache_key: Cache key of the URL's audio metadata
+        audio_meta: The metadata recorded when the download started
+        partial_path: Path the download was written to
+        path: Path of the complete download in the cache
+        digest: SHA-256 hex digest of the audio
+        
+    Returns:
+        The path of the cached audio
+    """
+    os.replace(partial_path, path)
+    cache.set(cache_key, {**audio_meta, "complete": True, "sha256": digest}, expire=AUDIO_CACHE_TTL)
+    
+    cutoff = time.time() - AUDIO_CACHE_TTL
+    for entry in os.scandir(AUDIO_CACHE_DIR):
         try:
-            subprocess.run(cmd, capture_output=True, check=True)
-            
-            # Check if the output file exists and has content
-            if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                chunk_files.append(output_file)
-                print(f"Created chunk {i+1}/{num_chunks}: {output_file}")
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+    return path
+
+def make_chunk_dir(expected_size):
+    """
+    Create a temporary directory for audio chunks.
+    
+    The chunks go to shared memory when it has room for them, so writing and
+    re-reading them never touches the disk.
+    
+    Args:
+        expected_size: Approximate total size of the chunks in bytes
+        
+    Returns:
+        A tempfile.TemporaryDirectory, removed with its contents on cleanup
+    """
+    parent = None
+    if os.path.isdir(SHARED_MEMORY_DIR):
+        # Leave headroom, /dev/shm is often small inside containers
+        if shutil.disk_usage(SHARED_MEMORY_DIR).free > expected_size * 2:
+            parent = SHARED_MEMORY_DIR
+    return tempfile.TemporaryDirectory(prefix="audio_chunks_", dir=parent)
+
+async def split_audio_stream(source, output_dir, chunk_duration_seconds=600, hasher=None, copy_to=None):
+    """
+    Split an MP3 stream into chunks by piping it into FFmpeg's segment muxer.
+    
+    Args:
+        source: A binary file-like object to read the MP3 data from, e.g. a raw response
+        output_dir: Directory to save the chunks
+        chunk_duration_seconds: Duration of each chunk in seconds (default: 10 minutes)
+        hasher: Optional hashlib object to feed every block that is read
+        copy_to: Optional binary file to also write every block that is read to
+        
+    Returns:
+        List of paths to the chunk files, or None if the stream doesn't start like MP3
+        (the blocks read so far have still been hashed and copied)
+    """
+    def read_block():
+        block = source.read(1024 * 1024)
+        if hasher is not None:
+            hasher.update(block)
+        if copy_to is not None:
+            copy_to.write(block)
+        return block
+    
+    # Reading the download, hashing and copying each block all block, so do them in
+    # a worker thread
+    block = await asyncio.to_thread(read_block)
+    if not looks_like_mp3(block):
+        return None
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-f", "mp3", "-i", "pipe:0",
+        "-map", "0:a",
+        "-f", "segment",
+        "-segment_time", str(chunk_duration_seconds),
+        "-reset_timestamps", "1",
+        "-c", "copy",
+        os.path.join(output_dir, "chunk_%03d.mp3")
+    ]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    # Drain stderr while feeding stdin so FFmpeg can never block on a full pipe
+    stderr_task = asyncio.create_task(proc.stderr.read())
+    
+    total_bytes = 0
+    try:
+        while block:
+            total_bytes += len(block)
+            proc.stdin.write(block)
+            await proc.stdin.drain()
+            block = await asyncio.to_thread(read_block)
+        proc.stdin.close()
+    except (BrokenPipeError, ConnectionResetError):
+        # FFmpeg exited early; its exit status and stderr explain why
+        pass
+    except BaseException:
+        proc.kill()
+        await proc.wait()
+        stderr_task.cancel()
+        raise
+    
+    stderr = await stderr_task
+    await proc.wait()
+    print(f"Streamed {total_bytes / (1024 * 1024):.2f} MB into FFmpeg")
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, None, stderr)
+    
+    return list_chunk_files(output_dir)
+
+async def transcription_batcher(queue):
+    """
+    Background task that groups queued chunk transcriptions into batches.
+    
+    Waits for the first job, then collects more for up to TRANSCRIPTION_BATCH_WAIT_SECONDS
+    or until TRANSCRIPTION_BATCH_SIZE jobs are queued, and dispatches them together
+    without waiting for the previous batch to finish.
+    
+    Args:
+        queue: The asyncio.Queue of (chunk_file, future) jobs
+    """
+    loop = asyncio.get_running_loop()
+    running = set()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + TRANSCRIPTION_BATCH_WAIT_SECONDS
+        while len(batch) < TRANSCRIPTION_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        print(f"Dispatching batch of {len(batch)} chunk transcriptions")
+        task = asyncio.create_task(run_transcription_batch(batch))
+        # Hold a reference until the batch finishes so it isn't garbage collected
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+async def run_transcription_batch(batch):
+    """
+    Transcribe a batch of queued chunks concurrently, resolving each job's future
+    as soon as its chunk is done.
+    
+    Args:
+        batch: List of (chunk_file, future) jobs
+    """
+    async def transcribe_job(chunk_file, future):
+        async with transcription_semaphore:
+            # The request may have gone away while this chunk waited for a slot
+            if future.done():
+                return
+            try:
+                result = await _transcribe_audio_chunk(chunk_file)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
             else:
-                print(f"Chunk {i+1}/{num_chunks} is empty or not created")
-                
-        except subprocess.SubprocessError as e:
-            print(f"Error creating chunk {i+1}: {str(e)}")
-            # If this is the last chunk and it failed, it might be because we're past the end of the file
-            if i < num_chunks - 1:
-                raise Exception(f"Failed to split audio file: {str(e)}")
+                if not future.done():
+                    future.set_result(result)
     
-    return chunk_files
+    # Skip chunks whose request was cancelled while they were queued; their
+    # files may already have been removed, and there's no one to send the text to
+    await asyncio.gather(
+        *[transcribe_job(chunk_file, future) for chunk_file, future in batch if not future.done()]
+    )
 
 async def transcribe_audio_chunk(chunk_file):
     """
     Transcribe a single audio chunk using OpenAI's Whisper API.
     
+    The job is queued for the transcription batcher, so chunks from concurrent
+    requests are sent together over the shared client.
+    
     Args:
         chunk_file: Path to the audio chunk file
         
     Returns:
         Transcription text
     """
+    future = asyncio.get_running_loop().create_future()
+    await app.state.transcription_queue.put((chunk_file, future))
+    return await future
+
+async def _transcribe_audio_chunk(chunk_file):
+    """Transcribe a single audio chunk; see transcribe_audio_chunk."""
     print(f"Transcribing chunk: {chunk_file}")
     
     try:
-        # Get OpenAI library version
-        try:
-            openai_version = openai.__version__
-            print(f"OpenAI library version: {openai_version}")
-        except AttributeError:
-            print("OpenAI library version unknown")
-        
-        transcript_text = ""
-        
-        # First try using the newer client method
-        try:
-            print("Attempting transcription with newer OpenAI client...")
-            from openai import OpenAI
-            client = OpenAI(api_key=OPENAI_API_KEY)
-            
-            with open(chunk_file, "rb") as audio_file:
-                response = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file
-                )
-            transcript_text = response.text
-            print(f"Transcription successful with new API. Length: {len(transcript_text)} chars")
-            
-        except (ImportError, AttributeError, Exception) as e:
-            print(f"New API failed: {str(e)}")
-            print("Falling back to legacy API...")
-            
-            # Fall back to legacy API
-            try:
-                with open(chunk_file, "rb") as audio_file:
-                    audio_file_data = audio_file.read()
-                
-                # Try direct API call
-                files = {
-                    'file': ('audio.mp3', audio_file_data),
-                    'model': (None, 'whisper-1')
-                }
-                headers = {
-                    'Authorization': f'Bearer {OPENAI_API_KEY}'
-                }
-                
-                print("Calling OpenAI API directly...")
-                api_response = requests.post(
-                    'https://api.openai.com/v1/audio/transcriptions',
-                    headers=headers,
-                    files=files
-                )
-                
-                if api_response.status_code == 200:
-                    result = api_response.json()
-                    transcript_text = result.get('text', '')
-                    print(f"Direct API call successful. Length: {len(transcript_text)} chars")
-                else:
-                    print(f"API call failed: {api_response.status_code}")
-                    print(f"Response: {api_response.text}")
-                    raise Exception(f"API call failed: {api_response.status_code} - {api_response.text}")
-                
-            except Exception as e:
-                print(f"Direct API call failed: {str(e)}")
-                raise
+        # Pass the open handle rather than its bytes: httpx streams it into the
+        # multipart body in small blocks instead of holding the chunk in memory
+        with open(chunk_file, "rb") as audio_file:
+            response = await app.state.openai_client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file
+            )
+        transcript_text = response.text
+        print(f"Transcription successful. Length: {len(transcript_text)} chars")
         
         return transcript_text
         
@@ -377,138 +780,327 @@ async def transcribe_audio_chunk(chunk_file):
 class TranscriptionRequest(BaseModel):
     audio_url: str
 
+def ndjson_line(record):
+    """Encode one record of a newline-delimited JSON stream."""
+    return json.dumps(record) + "\n"
+
+def cached_transcript_response(transcript):
+    """
+    Stream a cached transcript in the same format as a fresh transcription.
+    
+    Args:
+        transcript: The cached transcript text
+        
+    Returns:
+        A StreamingResponse with the transcript as a single chunk
+    """
+    records = [{"chunks": 1}, {"index": 0, "text": transcript}, {"transcript": transcript}]
+    return StreamingResponse(
+        iter([ndjson_line(record) for record in records]),
+        media_type="application/x-ndjson"
+    )
+
+def transcription_response(chunk_files, content_cache_key, url_cache_key, resources):
+    """
+    Build the streaming response for a transcription (see stream_transcription).
+    
+    A background task closes the stream and releases the resources once the response
+    is over, so they are also released if the response ends before the stream starts.
+    
+    Args:
+        chunk_files: Paths to the audio chunks, in order
+        content_cache_key: Cache key for the transcript under the audio's content hash
+        url_cache_key: Cache key for the transcript under the audio URL
+        resources: AsyncExitStack holding the request's temporary files and cache claim
+        
+    Returns:
+        A StreamingResponse of newline-delimited JSON records
+    """
+    body = stream_transcription(chunk_files, content_cache_key, url_cache_key, resources)
+    
+    async def release():
+        # Closing the generator cancels any chunks still in flight; both are no-ops
+        # if the stream already ran to completion
+        await body.aclose()
+        await resources.aclose()
+    
+    return StreamingResponse(body, media_type="application/x-ndjson", background=BackgroundTask(release))
+
+async def stream_transcription(chunk_files, content_cache_key, url_cache_key, resources):
+    """
+    Transcribe chunks concurrently, yielding each one as an NDJSON record as it completes.
+    
+    Records are {"chunks": n} first, then {"index": i, "text": ...} per chunk in
+    completion order, then {"transcript": ...} with the chunks joined in order. If a
+    chunk fails, an {"error": ...} record ends the stream instead.
+    
+    Args:
+        chunk_files: Paths to the audio chunks, in order
+        content_cache_key: Cache key for the transcript under the audio's content hash
+        url_cache_key: Cache key for the transcript under the audio URL
+        resources: AsyncExitStack holding the request's temporary files, released
+            once the stream ends
+    """
+    async with resources:
+        yield ndjson_line({"chunks": len(chunk_files)})
+        
+        async def transcribe_indexed(index, chunk_file):
+            return index, await transcribe_audio_chunk(chunk_file)
+        
+        tasks = [
+            asyncio.ensure_future(transcribe_indexed(index, chunk_file))
+            for index, chunk_file in enumerate(chunk_files)
+        ]
+        transcripts = [None] * len(chunk_files)
+        error = None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, text = await next_done
+                transcripts[index] = text
+                yield ndjson_line({"index": index, "text": text})
+        except Exception as e:
+            error = e
+        finally:
+            # Stop outstanding chunks if a chunk failed or the client went away
+            for task in tasks:
+                task.cancel()
+        
+        if error is not None:
+            print(f"Error processing chunks: {str(error)}")
+            yield ndjson_line({"error": f"Error processing audio chunks: {str(error)}"})
+            return
+        
+        # Combine the transcripts
+        full_transcript = " ".join(transcripts)
+        print(f"Combined transcript length: {len(full_transcript)} chars")
+        cache.set(content_cache_key, full_transcript)
+        cache.set(url_cache_key, full_transcript, expire=TRANSCRIPT_URL_CACHE_TTL)
+        yield ndjson_line({"transcript": full_transcript})
+
 @app.post("/api/transcribe")
 async def transcribe_podcast(request: TranscriptionRequest):
     if not OPENAI_API_KEY:
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
     
-    temp_audio_path = "temp_audio.mp3"
-    temp_dir = None
+    url_cache_key = f"transcript:url:{request.audio_url}"
+    cached_transcript = cache.get(url_cache_key)
+    if cached_transcript is not None:
+        print(f"Serving cached transcript for: {request.audio_url}")
+        return cached_transcript_response(cached_transcript)
+    
+    # Hash the audio as it downloads, so a republished URL with unchanged audio
+    # (or the same audio under another URL) still hits the cache
+    audio_hash = hashlib.sha256()
     
     try:
-        # Download the audio file from the URL
-        print(f"Downloading audio from: {request.audio_url}")
-        
-        # Check if the URL is valid and accessible
-        try:
-            audio_response = requests.get(request.audio_url, stream=True, timeout=30)
-            audio_response.raise_for_status()  # Will raise an exception for HTTP errors
-        except requests.exceptions.RequestException as e:
-            print(f"Error accessing URL: {str(e)}")
-            raise HTTPException(status_code=400, detail=f"Error accessing audio URL: {str(e)}")
-        
-        # Create a temporary file for the downloaded audio
-        try:
-            with open(temp_audio_path, 'wb') as f:
-                for chunk in audio_response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+        # Everything registered on the stack (temporary files, the audio cache claim)
+        # is released however the request ends
+        async with contextlib.AsyncExitStack() as stack:
+            # A unique path per request, so concurrent downloads don't overwrite each other
+            work_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="podcast_"))
+            temp_audio_path = os.path.join(work_dir, "audio.mp3")
             
-            file_size = os.path.getsize(temp_audio_path)
-            file_size_mb = file_size / (1024 * 1024)
-            print(f"Audio file downloaded to: {temp_audio_path}, Size: {file_size_mb:.2f} MB")
+            # Downloads are kept in the audio cache so a later request for the same URL can
+            # revalidate them with the server (or resume an interrupted download) rather than
+            # fetching the whole file again. Only one request at a time may write a URL's cache
+            # files; concurrent requests for the same URL download to a temporary file instead
+            audio_cache_key = f"audio:url:{request.audio_url}"
+            audio_lock_key = f"audio:lock:{request.audio_url}"
+            cached_audio_path, partial_audio_path = audio_cache_paths(request.audio_url)
+            owns_audio_cache = cache.add(audio_lock_key, True, expire=AUDIO_LOCK_TIMEOUT)
+            if owns_audio_cache:
+                stack.callback(cache.delete, audio_lock_key)
+            audio_meta = cache.get(audio_cache_key) if owns_audio_cache else None
             
-            if file_size == 0:
-                raise HTTPException(status_code=500, detail="Downloaded audio file is empty")
+            download_headers = {}
+            if audio_meta and audio_meta["complete"] and os.path.exists(cached_audio_path):
+                # Ask the server to skip the body if the audio hasn't changed
+                if audio_meta["etag"]:
+                    download_headers["If-None-Match"] = audio_meta["etag"]
+                if audio_meta["last_modified"]:
+                    download_headers["If-Modified-Since"] = audio_meta["last_modified"]
+            elif audio_meta and audio_meta["etag"] and os.path.exists(partial_audio_path):
+                # Resume the interrupted download; If-Range makes the server send the whole
+                # file instead if it has changed since
+                download_headers["Range"] = f"bytes={os.path.getsize(partial_audio_path)}-"
+                download_headers["If-Range"] = audio_meta["etag"]
+            
+            # Download the audio file from the URL
+            print(f"Downloading audio from: {request.audio_url}")
+            
+            # Check if the URL is valid and accessible. requests blocks (including its
+            # connection retries), so it runs in a thread to keep the event loop free
+            try:
+                audio_response = await asyncio.to_thread(
+                    SESSION.get, request.audio_url, stream=True, timeout=30, headers=download_headers
+                )
+                if audio_response.status_code == 416 and "Range" in download_headers:
+                    # The partial download can't be resumed, start over
+                    audio_response.close()
+                    os.remove(partial_audio_path)
+                    audio_response = await asyncio.to_thread(SESSION.get, request.audio_url, stream=True, timeout=30)
+                audio_response.raise_for_status()  # Will raise an exception for HTTP errors
+            except requests.exceptions.RequestException as e:
+                print(f"Error accessing URL: {str(e)}")
+                raise HTTPException(status_code=400, detail=f"Error accessing audio URL: {str(e)}")
+            stack.callback(audio_response.close)
+            
+            # Let urllib3 undo any Content-Encoding before the body is read
+            audio_response.raw.decode_content = True
+            content_length = int(audio_response.headers.get("Content-Length") or 0)
+            not_modified = audio_response.status_code == 304
+            resuming = audio_response.status_code == 206
+            
+            # Cache the download when the server gives us something to revalidate it with. A
+            # resumed download always continues the partial file, under the ETag it started with
+            etag = audio_response.headers.get("ETag")
+            last_modified = audio_response.headers.get("Last-Modified")
+            cache_download = owns_audio_cache and not not_modified and (resuming or bool(etag or last_modified))
+            if cache_download and not resuming:
+                os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+                audio_meta = {"etag": etag, "last_modified": last_modified, "complete": False, "sha256": None}
+                cache.set(audio_cache_key, audio_meta, expire=AUDIO_CACHE_TTL)
+            download_path = partial_audio_path if cache_download else temp_audio_path
+            
+            # Large MP3s are piped straight into FFmpeg's segment muxer, so the full
+            # download never has to be written to disk and read back
+            stream_split = (
+                audio_response.status_code == 200
+                and content_length > MAX_AUDIO_FILE_SIZE
+                and is_mp3_response(audio_response)
+                and await check_ffmpeg_installed()
+            )
+            
+            try:
+                if not_modified:
+                    print("Audio unchanged since it was cached, skipping download")
+                    audio_path = cached_audio_path
+                    audio_digest = audio_meta["sha256"]
+                    # Mark the cached file as recently used so pruning keeps it
+                    await asyncio.to_thread(os.utime, cached_audio_path)
+                elif stream_split:
+                    print(f"Audio file too large: {content_length / (1024 * 1024):.2f} MB - will stream it into chunks")
+                else:
+                    if resuming:
+                        # Hash what was already downloaded, then append the rest to it
+                        print(f"Resuming download from byte {os.path.getsize(partial_audio_path)}")
+                        await asyncio.to_thread(hash_file, partial_audio_path, audio_hash)
+                    
+                    # Write the downloaded audio to disk in a thread, as reading the body blocks
+                    await asyncio.to_thread(
+                        write_stream_to_file, audio_response.raw, download_path, 'ab' if resuming else 'wb', audio_hash
+                    )
+                    
+                    audio_digest = audio_hash.hexdigest()
+                    audio_path = download_path
+                    if cache_download:
+                        audio_path = await asyncio.to_thread(
+                            store_cached_audio, audio_cache_key, audio_meta, partial_audio_path, cached_audio_path, audio_digest
+                        )
+            except IOError as e:
+                print(f"I/O error writing audio file: {str(e)}")
+                raise HTTPException(status_code=500, detail=f"Error saving audio file: {str(e)}")
+            
+            if not stream_split:
+                file_size = os.path.getsize(audio_path)
+                file_size_mb = file_size / (1024 * 1024)
+                print(f"Audio file ready at: {audio_path}, Size: {file_size_mb:.2f} MB")
                 
-            # Check if file size exceeds OpenAI's limit (25MB)
-            if file_size > 25 * 1024 * 1024:  # 25MB in bytes
-                print(f"Audio file too large: {file_size_mb:.2f} MB - will split into chunks")
+                if file_size == 0:
+                    raise HTTPException(status_code=500, detail="Downloaded audio file is empty")
+                
+                content_cache_key = f"transcript:sha256:{audio_digest}"
+                cached_transcript = cache.get(content_cache_key)
+                if cached_transcript is not None:
+                    print("Audio content matches a cached transcript")
+                    cache.set(url_cache_key, cached_transcript, expire=TRANSCRIPT_URL_CACHE_TTL)
+                    return cached_transcript_response(cached_transcript)
                 
-                # Create a temporary directory for the chunks
-                temp_dir = tempfile.mkdtemp(prefix="audio_chunks_")
-                print(f"Created temporary directory for chunks: {temp_dir}")
+                # Check if file size is within OpenAI's limit (25MB)
+                if file_size <= MAX_AUDIO_FILE_SIZE:
+                    # File is small enough to transcribe directly, as a single chunk. The
+                    # response stream takes over the resources, as it reads the file
+                    print("File is within size limits, transcribing directly")
+                    return transcription_response([audio_path], content_cache_key, url_cache_key, stack.pop_all())
                 
-                try:
-                    # Split the audio file into chunks
-                    chunk_files = split_audio_file(
-                        temp_audio_path, 
+                print(f"Audio file too large: {file_size_mb:.2f} MB - will split into chunks")
+            
+            # Create a temporary directory for the chunks
+            temp_dir = stack.enter_context(make_chunk_dir(content_length if stream_split else file_size))
+            print(f"Created temporary directory for chunks: {temp_dir}")
+            
+            try:
+                # Split the audio into chunks
+                if stream_split:
+                    try:
+                        # Keep a copy of the stream for the audio cache as it goes by
+                        with open(download_path, 'wb') if cache_download else contextlib.nullcontext() as audio_copy:
+                            chunk_files = await split_audio_stream(
+                                audio_response.raw,
+                                temp_dir,
+                                chunk_duration_seconds=300,  # 5 minutes per chunk
+                                hasher=audio_hash,
+                                copy_to=audio_copy
+                            )
+                    except subprocess.CalledProcessError as e:
+                        print(f"FFmpeg could not split the audio stream: {(e.stderr or b'').decode(errors='replace').strip()}")
+                        chunk_files = None
+                    
+                    if chunk_files is None:
+                        # The audio isn't MP3 despite how it was served, or FFmpeg failed on it.
+                        # The stream has been partly consumed, so download the file again and
+                        # split it the regular way, which probes the codec and re-encodes
+                        print("Audio stream can't be split as MP3, downloading the file to split instead")
+                        stream_split = False
+                        for chunk_file in Path(temp_dir).glob("chunk_*.mp3"):
+                            chunk_file.unlink()
+                        
+                        audio_response = await asyncio.to_thread(SESSION.get, request.audio_url, stream=True, timeout=30)
+                        stack.callback(audio_response.close)
+                        audio_response.raise_for_status()
+                        audio_response.raw.decode_content = True
+                        audio_hash = hashlib.sha256()
+                        await asyncio.to_thread(write_stream_to_file, audio_response.raw, download_path, 'wb', audio_hash)
+                        audio_path = download_path
+                    
+                    audio_digest = audio_hash.hexdigest()
+                    content_cache_key = f"transcript:sha256:{audio_digest}"
+                    if cache_download:
+                        audio_path = await asyncio.to_thread(
+                            store_cached_audio, audio_cache_key, audio_meta, partial_audio_path, cached_audio_path, audio_digest
+                        )
+                
+                if not stream_split:
+                    chunk_files = await split_audio_file(
+                        audio_path, 
                         temp_dir,
                         chunk_duration_seconds=300,  # 5 minutes per chunk
                         max_size_mb=20              # 20MB max per chunk
                     )
-                    
-                    if not chunk_files:
-                        raise Exception("Failed to split audio file into chunks")
-                    
-                    print(f"Split audio into {len(chunk_files)} chunks")
-                    
-                    # Transcribe each chunk
-                    transcripts = []
-                    for chunk_file in chunk_files:
-                        chunk_transcript = await transcribe_audio_chunk(chunk_file)
-                        transcripts.append(chunk_transcript)
-                    
-                    # Combine the transcripts
-                    full_transcript = " ".join(transcripts)
-                    print(f"Combined transcript length: {len(full_transcript)} chars")
-                    
-                    # Clean up
-                    if os.path.exists(temp_audio_path):
-                        os.remove(temp_audio_path)
-                        print("Removed original audio file")
-                    
-                    if temp_dir and os.path.exists(temp_dir):
-                        shutil.rmtree(temp_dir)
-                        print(f"Removed temporary directory: {temp_dir}")
-                        temp_dir = None
-                    
-                    return {"transcript": full_transcript}
-                    
-                except Exception as e:
-                    print(f"Error processing chunks: {str(e)}")
-                    raise Exception(f"Error processing audio chunks: {str(e)}")
-                
-            else:
-                # File is small enough to transcribe directly
-                print("File is within size limits, transcribing directly")
-                transcript_text = await transcribe_audio_chunk(temp_audio_path)
                 
-                # Clean up
-                if os.path.exists(temp_audio_path):
-                    os.remove(temp_audio_path)
-                    print("Temporary file removed")
+                if not chunk_files:
+                    raise Exception("Failed to split audio file into chunks")
                 
-                return {"transcript": transcript_text}
-                
-        except IOError as e:
-            print(f"I/O error writing audio file: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error saving audio file: {str(e)}")
+                print(f"Split audio into {len(chunk_files)} chunks")
+            
+            except Exception as e:
+                print(f"Error processing chunks: {str(e)}")
+                raise Exception(f"Error processing audio chunks: {str(e)}")
+            
+            cached_transcript = cache.get(content_cache_key)
+            if cached_transcript is not None:
+                print("Audio content matches a cached transcript")
+                cache.set(url_cache_key, cached_transcript, expire=TRANSCRIPT_URL_CACHE_TTL)
+                return cached_transcript_response(cached_transcript)
+            
+            # The chunks are transcribed while the response streams, so hand the
+            # temporary files and the cache claim over to the stream to release
+            return transcription_response(chunk_files, content_cache_key, url_cache_key, stack.pop_all())
     
     except HTTPException:
-        # Clean up temp files if they exist
-        if os.path.exists(temp_audio_path):
-            try:
-                os.remove(temp_audio_path)
-                print("Cleaned up temp audio file after HTTP exception")
-            except:
-                pass
-        
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir)
-                print(f"Cleaned up temp directory after HTTP exception: {temp_dir}")
-            except:
-                pass
-        
-        # Re-raise the HTTP exception
         raise
         
     except Exception as e:
-        # Ensure temp files are cleaned up
-        if os.path.exists(temp_audio_path):
-            try:
-                os.remove(temp_audio_path)
-                print("Cleaned up temp audio file after error")
-            except:
-                pass
-        
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir)
-                print(f"Cleaned up temp directory after error: {temp_dir}")
-            except:
-                pass
-        
         # Capture the full stack trace
         trace = traceback.format_exc()
         print(f"Error processing request: {str(e)}")
@@ -536,79 +1128,200 @@ async def transcribe_podcast(request: TranscriptionRequest):
 class SummarizeRequest(BaseModel):
     transcript: str
 
+SUMMARY_SYSTEM_PROMPT = 'You are a helpful assistant that summarizes podcast transcripts and extracts key timestamps.'
+
+@functools.lru_cache(maxsize=None)
+def get_token_encoding():
+    """Load the tokenizer used to measure transcript length, once per process."""
+    return tiktoken.get_encoding("cl100k_base")
+
+def split_transcript(transcript, max_tokens=SUMMARY_CHUNK_TOKENS):
+    """
+    Split a transcript into sections of at most max_tokens tokens.
+    
+    Sections end on sentence boundaries where possible; a single sentence longer
+    than max_tokens is cut at a token boundary.
+    
+    Args:
+        transcript: The full transcript text
+        max_tokens: Maximum number of tokens per section
+        
+    Returns:
+        List of transcript sections, in order
+    """
+    encoding = get_token_encoding()
+    sections = []
+    current = []
+    current_tokens = 0
+    
+    for sentence in re.split(r'(?<=[.!?])\s+', transcript):
+        tokens = encoding.encode(sentence)
+        if current and current_tokens + len(tokens) > max_tokens:
+            sections.append(" ".join(current))
+            current = []
+            current_tokens = 0
+        
+        if len(tokens) > max_tokens:
+            for i in range(0, len(tokens), max_tokens):
+                sections.append(encoding.decode(tokens[i:i + max_tokens]))
+            continue
+        
+        current.append(sentence)
+        current_tokens += len(tokens)
+    
+    if current:
+        sections.append(" ".join(current))
+    return sections
+
+async def summarize_section(section):
+    """
+    Summarize one section of a long transcript, for combining in a final call.
+    
+    Args:
+        section: A section of the transcript
+        
+    Returns:
+        Summary text for the section
+    """
+    response = await app.state.openai_client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[
+            {'role': 'system', 'content': SUMMARY_SYSTEM_PROMPT},
+            {
+                'role': 'user',
+                'content': f"Summarize this section of a podcast transcript, keeping note of any timestamps and important segments:\n\n{section}"
+            }
+        ],
+        temperature=0.5,
+        max_tokens=500
+    )
+    return response.choices[0].message.content.strip()
+
+def sse_event(data, event=None):
+    """
+    Format a server-sent event.
+    
+    Args:
+        data: JSON-serializable payload for the event's data field
+        event: Optional event name; unnamed events are delivered as "message"
+        
+    Returns:
+        The encoded event, ready to be written to the response stream
+    """
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
 @app.post("/api/summarize")
-def summarize_transcript(request: SummarizeRequest):
+async def summarize_transcript(request: SummarizeRequest):
+    """
+    Summarize a transcript, streaming the summary as server-sent events.
+    
+    Each unnamed event carries {"delta": text} as the summary is generated; a final
+    "done" event carries the complete {"summary": text}, and an "error" event
+    carries {"detail": message} if generation fails part-way.
+    """
     if not OPENAI_API_KEY:
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
     
+    summary_cache_key = f"summary:sha256:{hashlib.sha256(request.transcript.encode()).hexdigest()}"
+    cached_summary = cache.get(summary_cache_key)
+    if cached_summary is not None:
+        print("Serving cached summary")
+        events = [sse_event({"delta": cached_summary}), sse_event({"summary": cached_summary}, event="done")]
+        return StreamingResponse(iter(events), media_type="text/event-stream")
+    
     try:
         # Show a loading message in the response
         print(f"Received transcript for summarization, length: {len(request.transcript)} chars")
         
-        # Make a direct API call to the OpenAI Chat Completions API using GPT-4o
-        headers = {
-            'Authorization': f'Bearer {OPENAI_API_KEY}',
-            'Content-Type': 'application/json'
-        }
-        
-        data = {
-            'model': 'gpt-4o',
-            'messages': [
-                {
-                    'role': 'system',
-                    'content': 'You are a helpful assistant that summarizes podcast transcripts and extracts key timestamps.'
-                },
-                {
-                    'role': 'user',
-                    'content': f"Summarize the following podcast transcript and extract key timestamps for important segments:\n\n{request.transcript}"
-                }
-            ],
-            'temperature': 0.5,
-            'max_tokens': 1000
-        }
-        
-        print("Calling OpenAI Chat Completions API with GPT-4o model")
-        api_response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers=headers,
-            json=data,
-            timeout=120  # Increased timeout for longer processing
-        )
-        
-        # Check for successful response
-        if api_response.status_code == 200:
-            result = api_response.json()
-            if 'choices' in result and len(result['choices']) > 0:
-                summary = result['choices'][0]['message']['content'].strip()
-                print(f"Successfully generated summary with GPT-4o, length: {len(summary)} chars")
-                return {"summary": summary}
-            else:
-                error_msg = "No choices in response"
-                print(f"API error: {error_msg}")
-                raise HTTPException(status_code=500, detail=f"Summarization failed: {error_msg}")
+        # A token always covers at least one byte, so a transcript this short fits in
+        # one section without tokenizing it. Tokenizing a long transcript is CPU-bound,
+        # so do it in a worker process
+        if len(request.transcript.encode()) <= SUMMARY_CHUNK_TOKENS:
+            sections = [request.transcript]
         else:
-            # Handle API errors
-            error_detail = "Unknown error"
-            try:
-                error_json = api_response.json()
-                if 'error' in error_json:
-                    error_detail = error_json['error'].get('message', 'Unknown error')
-            except:
-                error_detail = api_response.text or f"HTTP error {api_response.status_code}"
-            
-            print(f"API error: {error_detail}")
-            raise HTTPException(status_code=500, detail=f"OpenAI API error: {error_detail}")
+            sections = await run_in_process(split_transcript, request.transcript)
+        if len(sections) > 1:
+            # Map: summarize every section concurrently, then reduce the partial summaries below
+            print(f"Summarizing transcript in {len(sections)} sections")
+            partials = await asyncio.gather(*[summarize_section(section) for section in sections])
+            prompt = (
+                "The following are summaries of consecutive sections of a podcast transcript. "
+                "Combine them into a single summary and extract key timestamps for important segments:\n\n"
+                + "\n\n".join(partials)
+            )
+        else:
+            prompt = f"Summarize the following podcast transcript and extract key timestamps for important segments:\n\n{request.transcript}"
         
-    except requests.exceptions.RequestException as e:
-        print(f"Request error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Request error: {str(e)}")
+        print(f"Calling OpenAI Chat Completions API with {SUMMARY_MODEL} model")
+        stream = await app.state.openai_client.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[
+                {'role': 'system', 'content': SUMMARY_SYSTEM_PROMPT},
+                {'role': 'user', 'content': prompt}
+            ],
+            temperature=0.5,
+            max_tokens=1000,
+            stream=True
+        )
+    except openai.APIError as e:
+        print(f"API error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(e)}")
     except Exception as e:
         trace = traceback.format_exc()
         print(f"Summarization failed: {str(e)}")
         print(f"Stack trace: {trace}")
         raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+    
+    async def generate():
+        parts = []
+        error = None
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    parts.append(delta)
+                    yield sse_event({"delta": delta})
+        except Exception as e:
+            error = e
+        finally:
+            # Stop generation and free the pooled connection if the client went away
+            # or the stream failed; AsyncStream has no close() of its own
+            await stream.response.aclose()
+        
+        if error is not None:
+            print(f"Summarization failed: {str(error)}")
+            yield sse_event({"detail": f"Summarization failed: {str(error)}"}, event="error")
+            return
+        
+        summary = "".join(parts).strip()
+        if not summary:
+            print("API error: No content in response")
+            yield sse_event({"detail": "Summarization failed: No content in response"}, event="error")
+            return
+        
+        print(f"Successfully generated summary with {SUMMARY_MODEL}, length: {len(summary)} chars")
+        cache.set(summary_cache_key, summary)
+        yield sse_event({"summary": summary}, event="done")
+    
+    # Also close the OpenAI stream once the response is over, in case it ended
+    # before the generator started
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        background=BackgroundTask(stream.response.aclose)
+    )
 
-# Run with: uvicorn main:app --host 0.0.0.0 --port 8000
+# Run with: uvicorn main:app --host 0.0.0.0 --port 8000 --workers 4 --loop uvloop --http httptools
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    # Several worker processes so concurrent requests are spread across cores, on
+    # uvloop and the httptools parser (uvloop isn't available on Windows)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=4,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
+    ) 
\ No newline at end of file
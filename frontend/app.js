@@ -289,8 +289,31 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(errorDetail);
             }
             
-            const data = await response.json();
-            transcriptText.textContent = data.transcript;
+            // Chunks arrive as they finish, so keep them in chunk order and show what is ready
+            let chunks = [];
+            let streamError = null;
+            await readJsonLines(response, (record) => {
+                if (record.error) {
+                    streamError = record.error;
+                } else if (record.transcript !== undefined) {
+                    transcriptText.textContent = record.transcript;
+                } else if (record.chunks !== undefined) {
+                    chunks = new Array(record.chunks).fill("");
+                } else if (record.index !== undefined) {
+                    chunks[record.index] = record.text;
+                    transcriptText.textContent = chunks.filter((text) => text).join(" ");
+                }
+            });
+            
+            if (streamError) {
+                transcriptText.innerHTML = `
+                    <div class="error-container">
+                        <h3>Transcription Error</h3>
+                        <p>Error transcribing episode: ${streamError}</p>
+                    </div>
+                `;
+                throw new Error(streamError);
+            }
         } catch (error) {
             console.error("Transcription error:", error);
             // Only update the text if it hasn't been updated already with a specific error message
@@ -305,6 +328,70 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Read a newline-delimited JSON stream from a fetch response, calling onRecord(record)
+    // for each line as it arrives
+    async function readJsonLines(response, onRecord) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            
+            let newline;
+            while ((newline = buffer.indexOf("\n")) !== -1) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (line) {
+                    onRecord(JSON.parse(line));
+                }
+            }
+        }
+        if (buffer.trim()) {
+            onRecord(JSON.parse(buffer));
+        }
+    }
+
+    // Read a server-sent event stream from a fetch response, calling onEvent(name, data)
+    // for each event as it arrives
+    async function readEventStream(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            
+            // Events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                let eventName = "message";
+                let data = "";
+                for (const line of rawEvent.split("\n")) {
+                    if (line.startsWith("event:")) {
+                        eventName = line.slice(6).trim();
+                    } else if (line.startsWith("data:")) {
+                        data += line.slice(5).trim();
+                    }
+                }
+                if (data) {
+                    onEvent(eventName, JSON.parse(data));
+                }
+            }
+        }
+    }
+
     // Summarize and extract timestamps from the transcript
     async function summarizeTranscript(transcript) {
         try {
@@ -322,8 +409,18 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(`HTTP error! Status: ${response.status}`);
             }
             
-            const data = await response.json();
-            summaryText.textContent = data.summary;
+            // The summary streams in as it is generated
+            let summary = "";
+            await readEventStream(response, (eventName, data) => {
+                if (eventName === "error") {
+                    throw new Error(data.detail);
+                } else if (eventName === "done") {
+                    summary = data.summary;
+                } else {
+                    summary += data.delta;
+                }
+                summaryText.textContent = summary;
+            });
         } catch (error) {
             console.error("Summarization error:", error);
             summaryText.textContent = "Error generating summary. Please try again.";